@@ -15,7 +15,7 @@ import java.nio.ByteOrder;
  * <p>
  * Records audio from the default microphone (16kHz, mono, 16-bit PCM signed,
  * little-endian), saves it as {@code command.wav}, and sends it to a local
- * Python Whisper STT service via HTTP multipart/form-data.
+ * Python Whisper STT service as a raw {@code audio/wav} HTTP request body.
  * <p>
  * Implements RMS-based silence detection with configurable thresholds.
  * Uses only standard Java APIs — no JNI, no native bindings, no ML.
@@ -226,6 +226,10 @@ public class WhisperSpeechInput implements SpeechInput {
 
     /**
      * Sends command.wav to the Whisper STT service and parses the JSON response.
+     * <p>
+     * The WAV bytes are POSTed as the request body to {@code /transcribe_raw},
+     * which avoids multipart encoding on this side and multipart parsing /
+     * temp-file spooling on the server.
      *
      * @return transcribed text (lowercase, trimmed), or empty string on failure
      */
@@ -236,22 +240,26 @@ public class WhisperSpeechInput implements SpeechInput {
             return "";
         }
 
-        String boundary = "----VDASBoundary" + System.currentTimeMillis();
-
         try {
-            URL url = new URL(serverUrl + "/transcribe");
+            URL url = new URL(serverUrl + "/transcribe_raw");
             HttpURLConnection conn = (HttpURLConnection) url.openConnection();
             conn.setRequestMethod("POST");
             conn.setDoOutput(true);
             conn.setConnectTimeout(HTTP_CONNECT_TIMEOUT_MS);
             conn.setReadTimeout(HTTP_READ_TIMEOUT_MS);
-            conn.setRequestProperty("Content-Type", "multipart/form-data; boundary=" + boundary);
-
-            // Write multipart body
-            try (OutputStream os = conn.getOutputStream()) {
-                writeMultipartFile(os, boundary, "file", wavFile, "audio/wav");
-                // Final boundary
-                os.write(("--" + boundary + "--\r\n").getBytes());
+            conn.setRequestProperty("Content-Type", "audio/wav");
+            // Send Content-Length up front so the server can reject oversize
+            // uploads before reading them; also avoids buffering the body
+            conn.setFixedLengthStreamingMode(wavFile.length());
+
+            // Stream file bytes as the request body
+            try (OutputStream os = conn.getOutputStream();
+                    FileInputStream fis = new FileInputStream(wavFile)) {
+                byte[] buf = new byte[4096];
+                int len;
+                while ((len = fis.read(buf)) != -1) {
+                    os.write(buf, 0, len);
+                }
                 os.flush();
             }
 
@@ -283,31 +291,6 @@ public class WhisperSpeechInput implements SpeechInput {
         }
     }
 
-    /**
-     * Writes a single file part in multipart/form-data format.
-     */
-    private void writeMultipartFile(OutputStream os, String boundary,
-            String fieldName, File file, String contentType) throws IOException {
-        StringBuilder header = new StringBuilder();
-        header.append("--").append(boundary).append("\r\n");
-        header.append("Content-Disposition: form-data; name=\"").append(fieldName)
-                .append("\"; filename=\"").append(file.getName()).append("\"\r\n");
-        header.append("Content-Type: ").append(contentType).append("\r\n");
-        header.append("\r\n");
-        os.write(header.toString().getBytes());
-
-        // Stream file bytes
-        try (FileInputStream fis = new FileInputStream(file)) {
-            byte[] buf = new byte[4096];
-            int len;
-            while ((len = fis.read(buf)) != -1) {
-                os.write(buf, 0, len);
-            }
-        }
-
-        os.write("\r\n".getBytes());
-    }
-
     /**
      * Reads an input stream to a string. Returns empty string if stream is null.
      */
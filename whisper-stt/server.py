@@ -1,113 +1,455 @@
 """
 VDAS Whisper STT Microservice
 =============================
-Local speech-to-text server using OpenAI Whisper (base model).
-Exposes a single POST /transcribe endpoint for WAV audio files.
+Local speech-to-text server using Whisper (base model) on the
+faster-whisper / CTranslate2 runtime (int8 on CPU, FP16 on a CUDA GPU).
+Exposes POST /transcribe (multipart upload) and POST /transcribe_raw
+(WAV as the request body) endpoints for WAV audio files.
 
 Safety constraints:
 - Model loaded ONCE at startup
 - Max upload size: 1 MB
 - Max audio duration: 5 seconds
-- Single-worker to prevent concurrent Whisper execution
+- Single-worker; one inference batch runs at a time
 - No system command execution — no os.system, subprocess, etc.
 """
 
+import asyncio
 import io
-import threading
+import os
+import struct
 import wave
+from contextlib import asynccontextmanager
 
-import numpy as np
-import whisper
-from fastapi import FastAPI, File, HTTPException, UploadFile
-from fastapi.responses import JSONResponse
+
+# ── CPU placement ──────────────────────────────────────────────────
+# Runs before NumPy / CTranslate2 are imported so their OpenMP and MKL
+# runtimes pick up the thread count and binding policy below.
+def _parse_cpulist(cpulist: str) -> set:
+    """Parses a sysfs CPU list such as "0-7,16-23" into a set of CPU ids."""
+    cpus = set()
+    for part in cpulist.strip().split(","):
+        if part:
+            first, _, last = part.partition("-")
+            cpus.update(range(int(first), int(last or first) + 1))
+    return cpus
+
+
+def _pin_to_numa_node() -> int:
+    """
+    Restricts the process to the allowed CPUs of the first NUMA node that has
+    any (Linux only), so inference threads share one node's caches and local
+    memory instead of migrating across sockets.
+    Returns the number of CPUs the process may run on.
+    """
+    if not hasattr(os, "sched_setaffinity"):
+        return os.cpu_count() or 1
+
+    allowed = os.sched_getaffinity(0)
+    node_root = "/sys/devices/system/node"
+    try:
+        nodes = sorted(
+            (name for name in os.listdir(node_root) if name[4:].isdigit()),
+            key=lambda name: int(name[4:]),
+        )
+        for node in nodes:
+            with open(os.path.join(node_root, node, "cpulist")) as f:
+                local = _parse_cpulist(f.read()) & allowed
+            if local:
+                if local != allowed:
+                    os.sched_setaffinity(0, local)
+                return len(local)
+    except (OSError, ValueError):
+        pass
+    return len(allowed)
+
+
+def _omp_num_threads() -> int:
+    """
+    Reads the outermost thread count from OMP_NUM_THREADS, which may be a
+    nested-parallelism list such as "4,2". Falls back to CPU_THREADS when the
+    value is empty, malformed or not positive.
+    """
+    try:
+        threads = int(os.environ.get("OMP_NUM_THREADS", "").split(",")[0])
+    except ValueError:
+        return CPU_THREADS
+    return threads if threads > 0 else CPU_THREADS
+
+
+CPU_THREADS = _pin_to_numa_node()
+os.environ.setdefault("OMP_NUM_THREADS", str(CPU_THREADS))
+os.environ.setdefault("MKL_NUM_THREADS", str(CPU_THREADS))
+os.environ.setdefault("OMP_PROC_BIND", "close")
+os.environ.setdefault("OMP_PLACES", "cores")
+
+import ctranslate2  # noqa: E402
+import numpy as np  # noqa: E402
+from fastapi import FastAPI, File, HTTPException, Request, UploadFile  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from faster_whisper import WhisperModel  # noqa: E402
+from faster_whisper.tokenizer import Tokenizer  # noqa: E402
+from faster_whisper.transcribe import get_suppressed_tokens  # noqa: E402
+from numpy.lib.stride_tricks import sliding_window_view  # noqa: E402
 
 # ── Constants ──────────────────────────────────────────────────────
 WHISPER_MODEL = "base"
+# FP16 on a CUDA GPU (tensor cores); int8 dynamic-quantized GEMMs on CPU
+_COMPUTE_TYPES = {"cuda": "float16", "cpu": "int8"}
+# WHISPER_DEVICE env var: "auto" (default) uses CUDA when CTranslate2 sees a
+# GPU, and falls back to CPU if CUDA then fails to load or warm up. "cpu" /
+# "cuda" force a device; a forced CUDA device that fails stops startup.
+WHISPER_DEVICE = os.environ.get("WHISPER_DEVICE", "auto").strip().lower()
+_CPU_FALLBACK = WHISPER_DEVICE == "auto"
+if WHISPER_DEVICE == "auto":
+    WHISPER_DEVICE = "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+if WHISPER_DEVICE not in _COMPUTE_TYPES:
+    raise ValueError(f"WHISPER_DEVICE must be auto, cpu or cuda, got {WHISPER_DEVICE!r}")
 MAX_UPLOAD_BYTES = 1 * 1024 * 1024  # 1 MB
+MAX_REQUEST_BYTES = MAX_UPLOAD_BYTES + 16 * 1024  # + multipart boundaries/headers
 MAX_AUDIO_DURATION_SEC = 5.0
 ALLOWED_SAMPLE_RATE = 16000
 ALLOWED_CHANNELS = 1
 ALLOWED_SAMPLE_WIDTH = 2  # 16-bit = 2 bytes
+# A 5s command is far below one token per 80ms; 64 new tokens is a safe cap
+MAX_NEW_TOKENS = 64
+# Micro-batching: concurrent requests arriving within the window share one
+# encoder/decoder call; beyond the queue bound clients get 503.
+MAX_BATCH_SIZE = 8
+BATCH_WINDOW_SEC = 0.02
+# uvicorn answers 503 itself beyond this many connections / in-flight requests.
+# The transcription queue is sized below it: a full queue plus the running
+# batch leaves PROBE_HEADROOM slots, so /health still answers under load.
+MAX_CONCURRENCY = 48
+PROBE_HEADROOM = 8
+MAX_QUEUED_REQUESTS = MAX_CONCURRENCY - MAX_BATCH_SIZE - PROBE_HEADROOM  # 32
+_PCM_SCALE = np.float32(1.0 / 32768.0)
+# Canonical RIFF/WAVE header: RIFF, 16-byte PCM "fmt " chunk, then "data"
+_WAV_HEADER = struct.Struct("<4sI4s4sIHHIIHH4sI")
+_WAV_HEADER_SIZE = _WAV_HEADER.size  # 44
+_WAV_CONTENT_TYPES = ("audio/wav", "audio/wave", "audio/x-wav", "application/octet-stream")
+# Request Content-Type accepted per upload route, checked before the body is read
+_UPLOAD_CONTENT_TYPES = {
+    "/transcribe": ("multipart/form-data",),
+    "/transcribe_raw": _WAV_CONTENT_TYPES,
+}
 
 # ── App & Model ───────────────────────────────────────────────────
-app = FastAPI(title="VDAS Whisper STT", version="1.0.0")
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    global _request_queue
+    # Created here so the queue belongs to the server's event loop
+    _request_queue = asyncio.Queue(maxsize=MAX_QUEUED_REQUESTS)
+    worker = asyncio.create_task(_batch_worker())
+    yield
+    worker.cancel()
 
-print(f"[STT] Loading Whisper model '{WHISPER_MODEL}'...")
-model = whisper.load_model(WHISPER_MODEL)
-print(f"[STT] Model loaded successfully.")
 
-# Lock to serialize Whisper inference (single-worker safety)
-_inference_lock = threading.Lock()
+app = FastAPI(title="VDAS Whisper STT", version="1.0.0", lifespan=_lifespan)
 
 
-@app.get("/health")
-def health():
-    """Health check endpoint for Java startup verification."""
-    return {"status": "ok"}
+def _load_model(device: str) -> WhisperModel:
+    """Loads the Whisper model on `device` with that device's compute type."""
+    # CTranslate2 C++ runtime; num_workers=1 matches the single batch worker
+    # below (one model replica, no concurrent CUDA sessions), and CPU intra-op
+    # parallelism uses the pinned cores. A non-zero cpu_threads overrides
+    # OMP_NUM_THREADS inside CTranslate2, so pass the resolved value through to
+    # keep an operator's override in effect.
+    return WhisperModel(
+        WHISPER_MODEL,
+        device=device,
+        compute_type=_COMPUTE_TYPES[device],
+        cpu_threads=_omp_num_threads(),
+        num_workers=1,
+    )
 
 
-@app.post("/transcribe")
-async def transcribe(file: UploadFile = File(...)):
+def _fall_back_to_cpu(error: Exception) -> WhisperModel:
     """
-    Accepts a WAV file (16kHz, mono, 16-bit PCM signed).
-    Returns {"text": "<lowercase trimmed transcription>"}.
+    Reloads the model on CPU after an auto-detected CUDA device fails —
+    typically a driver that is present without the CUDA 12 cuBLAS / cuDNN 9
+    libraries, which CTranslate2 reports as a RuntimeError at load time or
+    only on the first encode. Re-raises `error` when the device was forced.
     """
+    global WHISPER_DEVICE
+    if WHISPER_DEVICE != "cuda" or not _CPU_FALLBACK:
+        raise error
+    print(f"[STT] CUDA unavailable ({error}); falling back to CPU.")
+    WHISPER_DEVICE = "cpu"
+    return _load_model("cpu")
 
-    # ── 1. Validate content type ──────────────────────────────────
-    if file.content_type and file.content_type not in (
-        "audio/wav",
-        "audio/wave",
-        "audio/x-wav",
-        "application/octet-stream",
+
+print(f"[STT] Loading Whisper model '{WHISPER_MODEL}' on {WHISPER_DEVICE}...")
+try:
+    model = _load_model(WHISPER_DEVICE)
+except RuntimeError as e:
+    model = _fall_back_to_cpu(e)
+# Requests waiting for the batch worker: (pcm_bytes, future) pairs
+_request_queue = None
+
+# Log-Mel front end constants, taken from the model's feature extractor
+_feature_extractor = model.feature_extractor
+N_FFT = _feature_extractor.n_fft
+HOP_LENGTH = _feature_extractor.hop_length
+N_SAMPLES = _feature_extractor.n_samples  # 30s window
+N_FRAMES = _feature_extractor.nb_max_frames
+
+# Built once: Mel filterbank, periodic Hann window, and one spectrogram row
+# per batch slot (only the batch worker's inference thread writes them)
+_mel_filters = _feature_extractor.mel_filters
+_hann_window = np.hanning(N_FFT + 1)[:-1].astype(np.float32)
+_mel_out = np.empty((MAX_BATCH_SIZE, _mel_filters.shape[0], N_FRAMES), dtype=np.float32)
+
+# STFT intermediates, reused for every clip (slots are processed in turn)
+_frames = np.empty((N_FRAMES, N_FFT), dtype=np.float32)
+_spectrum = np.empty((N_FRAMES, N_FFT // 2 + 1), dtype=np.complex64)
+_power = np.empty((N_FRAMES, N_FFT // 2 + 1), dtype=np.float32)
+
+# Decoding setup never changes (English, transcribe, no timestamps), so the
+# tokenizer, SOT prompt and suppressed-token set are resolved once
+_tokenizer = Tokenizer(
+    model.hf_tokenizer,
+    model.model.is_multilingual,
+    task="transcribe",
+    language="en",
+)
+_prompt = model.get_prompt(_tokenizer, [], without_timestamps=True)
+_suppress_tokens = get_suppressed_tokens(_tokenizer, [-1])
+
+# 30s float32 audio per batch slot, with N_FFT // 2 samples of STFT centre
+# padding on each side. PCM is written straight into it; only the samples
+# left over from a longer previous clip in the same slot are re-zeroed.
+_STFT_PAD = N_FFT // 2
+_padded = np.zeros((MAX_BATCH_SIZE, N_SAMPLES + 2 * _STFT_PAD), dtype=np.float32)
+_padded_len = [0] * MAX_BATCH_SIZE
+# Strided (N_FRAMES, N_FFT) STFT frame view over each slot's padded buffer
+_frame_views = [
+    sliding_window_view(row, N_FFT)[::HOP_LENGTH][:N_FRAMES] for row in _padded
+]
+
+
+def _pcm_to_float32(pcm_bytes: bytes, out: np.ndarray) -> np.ndarray:
+    """
+    Converts 16-bit signed PCM to float32 in [-1.0, 1.0], writing into `out`.
+    NumPy's ufunc loop casts int16 → float32 in small buffered blocks and
+    runs the scale with its SIMD kernels (SSE2/AVX2/NEON), so there is one
+    pass over the samples and no full-size intermediate array.
+    Returns the filled prefix of `out`.
+    """
+    n_samples = len(pcm_bytes) // ALLOWED_SAMPLE_WIDTH
+    pcm = np.frombuffer(pcm_bytes, dtype=np.int16, count=n_samples)
+    audio = out[:n_samples]
+    np.multiply(pcm, _PCM_SCALE, out=audio, dtype=np.float32, casting="unsafe")
+    return audio
+
+
+def _load_padded_audio(pcm_bytes: bytes, slot: int):
+    """
+    Writes a clip into the slot's preallocated 30s buffer, centre padding
+    included — no pad_or_trim copy per request.
+    """
+    row = _padded[slot]
+    n_samples = len(_pcm_to_float32(pcm_bytes, row[_STFT_PAD:]))
+    stale = _padded_len[slot]
+    if stale > n_samples:
+        row[_STFT_PAD + n_samples:_STFT_PAD + stale] = 0.0
+    _padded_len[slot] = n_samples
+
+    # Reflect the start into the left margin, as np.pad(mode="reflect") does;
+    # the right margin mirrors the zero tail and so stays zero
+    row[:_STFT_PAD] = row[2 * _STFT_PAD:_STFT_PAD:-1]
+
+
+def _log_mel_spectrogram(frames: np.ndarray, n_samples: int, out: np.ndarray) -> np.ndarray:
+    """
+    Computes Whisper's log-Mel spectrogram from a slot's strided frame view
+    (see _frame_views) holding a clip of `n_samples`. Same math as
+    faster-whisper's FeatureExtractor (centered STFT, drop the last frame),
+    but every buffer is preallocated; writes into `out` with shape
+    (n_mels, N_FRAMES).
+    """
+    # Frames starting past the clip see only the zero padding: their power is
+    # exactly 0, so only the leading frames are windowed and transformed.
+    # A 5s clip spans ~500 of the 3000 frames of the 30s window.
+    n_active = min(N_FRAMES, (_STFT_PAD + n_samples + HOP_LENGTH - 1) // HOP_LENGTH)
+
+    # Windowing happens in the copy out of the strided frame view
+    np.multiply(frames[:n_active], _hann_window, out=_frames[:n_active])
+    spectrum = np.fft.rfft(_frames[:n_active], axis=-1, out=_spectrum[:n_active])
+
+    # |X|^2 = re^2 + im^2: square the interleaved (re, im) pairs in place,
+    # then sum them — no complex abs() and no extra temporaries
+    pairs = spectrum.view(np.float32).reshape(n_active, -1, 2)
+    np.square(pairs, out=pairs)
+    power = _power[:n_active]
+    np.add(pairs[..., 0], pairs[..., 1], out=power)
+
+    mel = out
+    np.matmul(_mel_filters, power.T, out=mel[:, :n_active])
+    mel[:, n_active:] = 0.0
+    np.maximum(mel, 1e-10, out=mel)
+    np.log10(mel, out=mel)
+    np.maximum(mel, mel.max() - 8.0, out=mel)
+    mel += 4.0
+    mel /= 4.0
+    return mel
+
+
+def _select_rows(encoder_output, rows: list):
+    """
+    Gathers the given batch rows of an encoder output into a new StorageView,
+    so a retry decodes them without a second encoder pass. A CUDA output is
+    copied to the host first; generate() moves it back to the model's device.
+    """
+    if encoder_output.device != "cpu":
+        encoder_output = encoder_output.to_device(ctranslate2.Device.cpu)
+    rows_array = np.ascontiguousarray(np.asarray(encoder_output)[rows])
+    return ctranslate2.StorageView.from_array(rows_array)
+
+
+def _greedy_decode(encoder_output, batch_size: int) -> list:
+    """
+    Greedy (temperature 0) decode of a batch of encoded 30s windows.
+    Generation is capped at MAX_NEW_TOKENS; rows that hit the cap are
+    decoded again from their encoder output with the full token budget.
+    """
+    results = model.model.generate(
+        encoder_output,
+        [_prompt] * batch_size,
+        beam_size=1,
+        max_length=len(_prompt) + MAX_NEW_TOKENS,
+        suppress_blank=True,
+        suppress_tokens=_suppress_tokens,
+    )
+    tokens = [result.sequences_ids[0] for result in results]
+
+    capped = [i for i, seq in enumerate(tokens) if len(seq) >= MAX_NEW_TOKENS]
+    if capped:
+        retry = model.model.generate(
+            _select_rows(encoder_output, capped),
+            [_prompt] * len(capped),
+            beam_size=1,
+            max_length=model.max_length,
+            suppress_blank=True,
+            suppress_tokens=_suppress_tokens,
+        )
+        for i, result in zip(capped, retry):
+            tokens[i] = result.sequences_ids[0]
+
+    return [_tokenizer.decode(seq) for seq in tokens]
+
+
+def _transcribe_batch(pcm_batch: list) -> list:
+    """
+    Runs one encoder + decoder pass over up to MAX_BATCH_SIZE clips.
+    Called from a worker thread; the batch worker runs one batch at a time,
+    so the shared audio and spectrogram buffers need no lock.
+    """
+    batch_size = len(pcm_batch)
+    for i, pcm_bytes in enumerate(pcm_batch):
+        _load_padded_audio(pcm_bytes, i)
+        _log_mel_spectrogram(_frame_views[i], _padded_len[i], _mel_out[i])
+
+    encoder_output = model.encode(_mel_out[:batch_size])
+    return _greedy_decode(encoder_output, batch_size)
+
+
+async def _batch_worker():
+    """
+    Collects queued requests into batches and runs them off the event loop.
+    A batch closes when it is full or BATCH_WINDOW_SEC after its first item.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await _request_queue.get()]
+        deadline = loop.time() + BATCH_WINDOW_SEC
+        while len(batch) < MAX_BATCH_SIZE:
+            try:
+                batch.append(_request_queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            if loop.time() >= deadline:
+                break
+            await asyncio.sleep(0.002)
+
+        # Drop requests whose client has already gone away
+        batch = [(pcm, fut) for pcm, fut in batch if not fut.done()]
+        if not batch:
+            continue
+
+        try:
+            texts = await loop.run_in_executor(
+                None, _transcribe_batch, [pcm for pcm, _ in batch]
+            )
+        except Exception as e:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+        else:
+            for (_, fut), text in zip(batch, texts):
+                if not fut.done():
+                    fut.set_result(text)
+
+
+def _parse_wav_header(header: bytes):
+    """
+    Parses a canonical 44-byte PCM WAV header.
+    Returns (sample_rate, channels, sample_width, data_size), or None if the
+    header does not have the canonical RIFF / fmt(16) / data layout.
+    """
+    if len(header) < _WAV_HEADER_SIZE:
+        return None
+    (
+        riff_id, _, wave_id, fmt_id, fmt_size, audio_format, channels,
+        sample_rate, _, _, bits_per_sample, data_id, data_size,
+    ) = _WAV_HEADER.unpack_from(header)
+    if (
+        riff_id != b"RIFF"
+        or wave_id != b"WAVE"
+        or fmt_id != b"fmt "
+        or fmt_size != 16
+        or audio_format != 1  # WAVE_FORMAT_PCM
+        or data_id != b"data"
     ):
+        return None
+    return sample_rate, channels, bits_per_sample // 8, data_size
+
+
+def _validate_audio_format(sample_rate: int, channels: int, sample_width: int, n_frames: int):
+    """Raises HTTP 400 unless the audio is 16kHz mono 16-bit and short enough."""
+    if sample_rate != ALLOWED_SAMPLE_RATE:
         raise HTTPException(
-            status_code=415,
-            detail=f"Unsupported media type: {file.content_type}. Expected WAV audio.",
+            status_code=400,
+            detail=f"Invalid sample rate: {sample_rate}. Expected {ALLOWED_SAMPLE_RATE}.",
         )
-
-    # ── 2. Read and enforce size limit ────────────────────────────
-    raw_bytes = await file.read()
-    if len(raw_bytes) > MAX_UPLOAD_BYTES:
+    if channels != ALLOWED_CHANNELS:
         raise HTTPException(
-            status_code=413,
-            detail=f"File too large: {len(raw_bytes)} bytes. Max: {MAX_UPLOAD_BYTES} bytes.",
+            status_code=400,
+            detail=f"Invalid channels: {channels}. Expected mono ({ALLOWED_CHANNELS}).",
+        )
+    if sample_width != ALLOWED_SAMPLE_WIDTH:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid sample width: {sample_width} bytes. Expected {ALLOWED_SAMPLE_WIDTH} (16-bit).",
+        )
+    duration_sec = n_frames / sample_rate
+    if duration_sec > MAX_AUDIO_DURATION_SEC:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Audio too long: {duration_sec:.1f}s. Max: {MAX_AUDIO_DURATION_SEC}s.",
         )
 
-    if len(raw_bytes) == 0:
-        raise HTTPException(status_code=400, detail="Empty file received.")
 
-    # ── 3. Validate WAV structure and extract PCM frames ──────────
+def _read_wav_frames(raw_bytes: bytes) -> bytes:
+    """Validates a WAV file with the `wave` module and returns its PCM frames."""
     try:
         with wave.open(io.BytesIO(raw_bytes), "rb") as wf:
-            sample_rate = wf.getframerate()
-            channels = wf.getnchannels()
-            sample_width = wf.getsampwidth()
             n_frames = wf.getnframes()
-            duration_sec = n_frames / sample_rate
-
-            if sample_rate != ALLOWED_SAMPLE_RATE:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Invalid sample rate: {sample_rate}. Expected {ALLOWED_SAMPLE_RATE}.",
-                )
-            if channels != ALLOWED_CHANNELS:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Invalid channels: {channels}. Expected mono ({ALLOWED_CHANNELS}).",
-                )
-            if sample_width != ALLOWED_SAMPLE_WIDTH:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Invalid sample width: {sample_width} bytes. Expected {ALLOWED_SAMPLE_WIDTH} (16-bit).",
-                )
-            if duration_sec > MAX_AUDIO_DURATION_SEC:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Audio too long: {duration_sec:.1f}s. Max: {MAX_AUDIO_DURATION_SEC}s.",
-                )
-
-            # Read raw PCM frames directly — no ffmpeg needed
-            pcm_bytes = wf.readframes(n_frames)
+            _validate_audio_format(
+                wf.getframerate(), wf.getnchannels(), wf.getsampwidth(), n_frames
+            )
+            return wf.readframes(n_frames)
     except HTTPException:
         raise
     except Exception as e:
@@ -115,47 +457,199 @@ async def transcribe(file: UploadFile = File(...)):
             status_code=400, detail=f"Invalid WAV file: {str(e)}"
         )
 
-    # ── 4. Convert PCM to float32 numpy array ─────────────────────
-    # 16-bit signed PCM → float32 normalized to [-1.0, 1.0]
-    audio_np = np.frombuffer(pcm_bytes, dtype=np.int16).astype(np.float32) / 32768.0
-
-    # Pad or trim to exactly 30 seconds (Whisper's expected input length)
-    # whisper.pad_or_trim handles this cleanly
-    audio_np = whisper.pad_or_trim(audio_np)
 
-    # ── 5. Transcribe with lock ───────────────────────────────────
-    acquired = _inference_lock.acquire(timeout=10)
-    if not acquired:
+async def _transcribe_pcm(pcm_bytes) -> str:
+    """
+    Queues validated PCM for the batch worker and waits for its text.
+    Returns the transcription lowercased and trimmed.
+    """
+    future = asyncio.get_running_loop().create_future()
+    try:
+        _request_queue.put_nowait((pcm_bytes, future))
+    except asyncio.QueueFull:
         raise HTTPException(
             status_code=503,
             detail="STT service busy. Try again shortly.",
         )
     try:
-        # Pass numpy array directly — bypasses load_audio() / ffmpeg entirely
-        mel = whisper.log_mel_spectrogram(audio_np, model.dims.n_mels).to(model.device)
-        options = whisper.DecodingOptions(language="en", fp16=False)
-        result = whisper.decode(model, mel, options)
+        text = await future
     except Exception as e:
         print(f"[STT] Transcription error: {e}")
         raise HTTPException(status_code=500, detail=f"Transcription failed: {str(e)}")
-    finally:
-        _inference_lock.release()
+    return text.strip().lower()
+
+
+@app.middleware("http")
+async def _guard_uploads(request: Request, call_next):
+    """
+    Rejects uploads from their headers alone, before any body byte is read:
+    415 for a Content-Type the route does not take, 413 when the declared
+    Content-Length is over the cap. Chunked uploads fall through to the
+    endpoint's own size checks.
+    """
+    accepted = _UPLOAD_CONTENT_TYPES.get(request.url.path)
+    if accepted is not None and request.method == "POST":
+        content_type = request.headers.get("content-type", "")
+        if not content_type.lower().startswith(accepted):
+            return JSONResponse(
+                status_code=415,
+                content={"detail": f"Unsupported media type: {content_type}. Expected {' or '.join(accepted)}."},
+            )
+        content_length = request.headers.get("content-length", "")
+        if content_length.isdigit() and int(content_length) > MAX_REQUEST_BYTES:
+            return JSONResponse(
+                status_code=413,
+                content={"detail": f"Request too large: {content_length} bytes. Max: {MAX_REQUEST_BYTES} bytes."},
+            )
+    return await call_next(request)
+
+
+@app.get("/health")
+def health():
+    """Health check endpoint for Java startup verification."""
+    return {"status": "ok"}
+
+
+@app.post("/transcribe")
+async def transcribe(file: UploadFile = File(...)):
+    """
+    Accepts a WAV file (16kHz, mono, 16-bit PCM signed).
+    Returns {"text": "<lowercase trimmed transcription>"}.
+    """
+
+    # ── 1. Validate content type ──────────────────────────────────
+    if file.content_type and file.content_type not in _WAV_CONTENT_TYPES:
+        raise HTTPException(
+            status_code=415,
+            detail=f"Unsupported media type: {file.content_type}. Expected WAV audio.",
+        )
+
+    # ── 2. Enforce size limit before reading the body ─────────────
+    if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File too large: {file.size} bytes. Max: {MAX_UPLOAD_BYTES} bytes.",
+        )
+
+    # ── 3. Validate WAV header, then read exactly the PCM payload ─
+    header = await file.read(_WAV_HEADER_SIZE)
+    if len(header) == 0:
+        raise HTTPException(status_code=400, detail="Empty file received.")
 
-    # ── 6. Return lowercase trimmed text ──────────────────────────
-    # whisper.decode returns a DecodingResult object, not a dict
-    text = result.text.strip().lower()
+    wav_format = _parse_wav_header(header)
+    if wav_format is not None:
+        sample_rate, channels, sample_width, data_size = wav_format
+        # Rate/channels/width are checked first, so the frame size is fixed
+        n_frames = data_size // (ALLOWED_CHANNELS * ALLOWED_SAMPLE_WIDTH)
+        _validate_audio_format(sample_rate, channels, sample_width, n_frames)
+        # Read raw PCM frames directly — no ffmpeg, no second parse
+        pcm_bytes = await file.read(data_size)
+    else:
+        # Non-canonical layout (extra chunks, extensible fmt): full parse
+        raw_bytes = header + await file.read()
+        if len(raw_bytes) > MAX_UPLOAD_BYTES:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File too large: {len(raw_bytes)} bytes. Max: {MAX_UPLOAD_BYTES} bytes.",
+            )
+        pcm_bytes = _read_wav_frames(raw_bytes)
+
+    # ── 4. Transcribe and return lowercase trimmed text ───────────
+    text = await _transcribe_pcm(pcm_bytes)
     return JSONResponse(content={"text": text})
 
 
+@app.post("/transcribe_raw")
+async def transcribe_raw(request: Request):
+    """
+    Accepts a WAV file (16kHz, mono, 16-bit PCM signed) as the raw request
+    body with an audio/wav Content-Type — no multipart parsing and no
+    UploadFile spooling.
+    Returns {"text": "<lowercase trimmed transcription>"}.
+    """
+
+    # ── 1. Read the body, enforcing the size limit as it arrives ──
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > MAX_UPLOAD_BYTES:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File too large: more than {MAX_UPLOAD_BYTES} bytes.",
+            )
+
+    if len(body) == 0:
+        raise HTTPException(status_code=400, detail="Empty file received.")
+
+    # ── 2. Validate WAV structure and slice out the PCM frames ────
+    wav_format = _parse_wav_header(body)
+    if wav_format is not None:
+        sample_rate, channels, sample_width, data_size = wav_format
+        # Rate/channels/width are checked first, so the frame size is fixed
+        n_frames = data_size // (ALLOWED_CHANNELS * ALLOWED_SAMPLE_WIDTH)
+        _validate_audio_format(sample_rate, channels, sample_width, n_frames)
+        # Zero-copy view of the payload
+        pcm_bytes = memoryview(body)[_WAV_HEADER_SIZE:_WAV_HEADER_SIZE + data_size]
+    else:
+        pcm_bytes = _read_wav_frames(bytes(body))
+
+    # ── 3. Transcribe and return lowercase trimmed text ───────────
+    text = await _transcribe_pcm(pcm_bytes)
+    return JSONResponse(content={"text": text})
+
+
+def _warm_up():
+    """
+    Runs a silent 5s clip through features, encoder and a short greedy
+    decode so thread pools, allocator caches and lazy imports are set up
+    before the first real request. Every batch slot's buffers are written
+    once too, so their pages are faulted in now rather than on first use.
+    """
+    silence = bytes(int(MAX_AUDIO_DURATION_SEC * ALLOWED_SAMPLE_RATE) * ALLOWED_SAMPLE_WIDTH)
+    for slot in range(MAX_BATCH_SIZE):
+        _load_padded_audio(silence, slot)
+        _log_mel_spectrogram(_frame_views[slot], _padded_len[slot], _mel_out[slot])
+
+    model.model.generate(
+        model.encode(_mel_out[:1]),
+        [_prompt],
+        beam_size=1,
+        max_length=len(_prompt) + 8,
+        suppress_blank=True,
+        suppress_tokens=_suppress_tokens,
+    )
+
+
+# Warm up at import, before the server binds, so /health only answers
+# once transcription is at steady state
+try:
+    _warm_up()
+except RuntimeError as e:
+    model = _fall_back_to_cpu(e)
+    _warm_up()
+# Report the compute type CTranslate2 resolved for this device (e.g. int8_float32)
+print(f"[STT] Model loaded successfully (compute type: {model.model.compute_type}).")
+
+
 # ── Entry point ───────────────────────────────────────────────────
 if __name__ == "__main__":
+    import sys
+
     import uvicorn
 
-    # Single worker to prevent concurrent Whisper execution
+    # Single worker to prevent concurrent Whisper execution. The app object
+    # is passed directly: an import string would import this module a second
+    # time and load the model twice.
     uvicorn.run(
-        "server:app",
+        app,
         host="0.0.0.0",
         port=8000,
         workers=1,
-        log_level="info",
+        # uvloop + httptools (from uvicorn[standard]); uvloop has no Windows build
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        # No per-request access log line; shed load with 503 past MAX_CONCURRENCY
+        access_log=False,
+        log_level="warning",
+        limit_concurrency=MAX_CONCURRENCY,
     )
@@ -0,0 +1,58 @@
+"""
+Parity tests for the server's log-Mel front end against faster-whisper's
+FeatureExtractor, which it replaces. Importing server loads the Whisper
+model, so the module is skipped when the model is not in the local cache.
+"""
+
+import numpy as np
+import pytest
+from faster_whisper.utils import download_model
+
+try:
+    download_model("base", local_files_only=True)  # server.WHISPER_MODEL
+except OSError as e:
+    pytest.skip(f"Whisper model not cached: {e}", allow_module_level=True)
+
+import server  # noqa: E402
+
+# Measured difference is about 1.2e-7 (1 ULP near 1.0); a changed window,
+# filterbank or normalisation moves values by orders of magnitude more.
+ATOL = 1e-6
+
+
+def _clip(n_samples: int, seed: int = 0):
+    """Returns random 16-bit PCM bytes and the same samples as float32."""
+    pcm = np.random.default_rng(seed).integers(-32768, 32768, n_samples, dtype=np.int16)
+    return pcm.tobytes(), pcm.astype(np.float32) / 32768.0
+
+
+def _reference(audio: np.ndarray) -> np.ndarray:
+    padded = np.pad(audio, (0, server.N_SAMPLES - len(audio)))
+    return server._feature_extractor(padded, padding=0)[:, :server.N_FRAMES]
+
+
+def _features(pcm_bytes: bytes, slot: int) -> np.ndarray:
+    server._load_padded_audio(pcm_bytes, slot)
+    return server._log_mel_spectrogram(
+        server._frame_views[slot], server._padded_len[slot], server._mel_out[slot]
+    ).copy()
+
+
+# Lengths around the STFT centre padding (200) and hop (160), up to the 5s limit
+@pytest.mark.parametrize("n_samples", [0, 1, 159, 160, 199, 200, 201, 401, 16000, 80000])
+@pytest.mark.parametrize("slot", [0, server.MAX_BATCH_SIZE - 1])
+def test_log_mel_matches_feature_extractor(n_samples, slot):
+    pcm_bytes, audio = _clip(n_samples)
+    np.testing.assert_allclose(_features(pcm_bytes, slot), _reference(audio), rtol=0, atol=ATOL)
+
+
+# A slot keeps the previous clip's samples until they are overwritten or
+# re-zeroed, so shorter clips after longer ones must not see the stale tail
+@pytest.mark.parametrize(
+    "lengths",
+    [(80000, 16000, 1), (1, 80000, 0), (16000, 201, 16000), (0, 400, 80000, 399)],
+)
+def test_log_mel_matches_after_slot_reuse(lengths):
+    for seed, n_samples in enumerate(lengths):
+        pcm_bytes, audio = _clip(n_samples, seed)
+        np.testing.assert_allclose(_features(pcm_bytes, 1), _reference(audio), rtol=0, atol=ATOL)